@@ -8,18 +8,250 @@ Fixed: StreamlitDuplicateElementId error with unique button keys
 import streamlit as st
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import hashlib
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import astuple
 from io import BytesIO
 
 from firm_power_dispatch import (
     SystemConfig, run_dispatch, run_bess_sensitivity,
-    run_pv_sensitivity, get_representative_days
-)
-from firm_power_charts import (
-    chart_cf_vs_bess,
-    chart_dispatch_profile,
-    build_summary_table
+    run_pv_sensitivity,
+    MODE_FIRM, MODE_SUPPLEMENTAL, MODE_SHUTDOWN, warm_up
 )
 
+
+# ══════════════════════════════════════════════════════════════════════════════
+# CACHED HELPERS
+# ══════════════════════════════════════════════════════════════════════════════
+def _file_digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _profile_key(upload) -> tuple:
+    """
+    (content digest, 'csv' | 'xlsx') - renaming a file doesn't miss the parse or sweep caches.
+    Digests are remembered per upload (file_id) so repeat runs don't re-hash the bytes.
+    """
+    digests = st.session_state.setdefault('upload_digests', {})
+    if upload.file_id not in digests:
+        digests[upload.file_id] = _file_digest(upload.getvalue())
+    kind = 'csv' if upload.name.lower().endswith('.csv') else 'xlsx'
+    return digests[upload.file_id], kind
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _parse_profile(digest: str, kind: str, _data: bytes) -> np.ndarray:
+    """
+    Parse an uploaded 8760h profile; memoized on (digest, kind).
+    _data is skipped by Streamlit's hasher - the content digest stands in for it.
+    """
+    buf = BytesIO(_data)
+    if kind == 'csv':
+        # Arrow's C++ reader; numeric columns are picked from the schema, no pandas pass
+        table = pa_csv.read_csv(buf)
+        num_cols = [f.name for f in table.schema
+                    if pa.types.is_integer(f.type) or pa.types.is_floating(f.type)]
+        column = table.column(num_cols[1] if len(num_cols) > 1 else num_cols[0])
+        return np.ascontiguousarray(column.slice(0, 8760).to_numpy(), dtype=np.float32)
+
+    # Rust-backed calamine reader; openpyxl's pure-Python XML walk dominated xlsx uploads
+    df = pd.read_excel(buf, engine='calamine')
+    num_cols = df.select_dtypes(include=[np.number]).columns
+    series = df[num_cols[1]] if len(num_cols) > 1 else df[num_cols[0]]
+    return np.ascontiguousarray(series.to_numpy()[:8760], dtype=np.float32)
+
+
+_NUMBER = r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+_SIZE_LIST = re.compile(rf'[\s,]*(?:{_NUMBER}(?:[\s,]+|\Z))*')
+# Label is everything before the first ':' (stripped by the caller); [^\S\n] is whitespace short of a line break
+_PV_CASE = re.compile(rf'^([^:\n]*):[^\S\n]*({_NUMBER})[^\S\n]*$', re.MULTILINE)
+
+
+@st.cache_data(show_spinner=False)
+def _parse_sizes(text: str) -> tuple:
+    """'500, 1000, ...' -> sorted tuple of floats (hashable sweep cache key)."""
+    if not _SIZE_LIST.fullmatch(text):
+        raise ValueError(f"invalid BESS sizes: {text!r}")
+    return tuple(sorted(float(x) for x in re.findall(_NUMBER, text)))
+
+
+@st.cache_data(show_spinner=False)
+def _parse_pv_cases(text: str) -> tuple:
+    """'Label: MW' per line -> ((label, mw), ...); unparseable lines are skipped."""
+    # Rejoin on '\n' so CRLF / lone-CR pastes split into lines exactly as splitlines() does
+    lines = '\n'.join(text.splitlines())
+    return tuple({label.strip(): float(mw) for label, mw in _PV_CASE.findall(lines)}.items())
+
+
+MODE_ARROW_TYPE = pa.dictionary(pa.int8(), pa.string())
+
+
+def _to_arrow(hourly_df) -> pa.Table:
+    """
+    Hourly frame -> Arrow table for storage: float columns quantized to float32
+    (summaries are already reduced in float64) and Operation_Mode as dictionary<int8, string>.
+    """
+    table = pa.Table.from_pandas(hourly_df, preserve_index=False)
+    schema = pa.schema([
+        pa.field(f.name, MODE_ARROW_TYPE) if f.name == 'Operation_Mode'
+        else pa.field(f.name, pa.float32()) if pa.types.is_float64(f.type)
+        else f
+        for f in table.schema
+    ])
+    return table.cast(schema)
+
+
+# The cache_resource helpers below return one shared object per key rather than
+# unpickling a copy on every hit; nothing downstream mutates their results.
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _cached_sweep(profile_key: tuple, _pv_raw, _wind_raw, bess_sizes: tuple, pv_cases: tuple,
+                  pv_ref_mw: float, config_fields: tuple):
+    """
+    Full PV x BESS sweep plus no-BESS baseline, memoized on the inputs.
+    profile_key is the (digest, kind) pair of each upload, which fully determines
+    the parsed arrays, so _pv_raw/_wind_raw are not re-hashed on every call.
+    Progress elements live inside so Streamlit can replay them on a cache hit.
+    """
+    pv_raw, wind_raw = _pv_raw, _wind_raw
+    cfg = SystemConfig(*config_fields)
+    total_runs = len(bess_sizes) * len(pv_cases)
+    pbar = st.progress(0)
+    status = st.empty()
+    run_count = [0]
+    # ~20 UI updates per sweep regardless of size; each one is a websocket delta
+    update_every = max(1, total_runs // 20)
+
+    def progress_cb(idx, total, bess_sz):
+        run_count[0] += 1
+        if run_count[0] % update_every and run_count[0] != total_runs:
+            return
+        pct = int(run_count[0] / total_runs * 100)
+        pbar.progress(pct)
+        status.text(f"⚙️ Testing battery size {int(bess_sz):,} MWh... ({run_count[0]}/{total_runs})")
+
+    # No-BESS baseline, one run per distinct PV MW. If 0 MWh is part of the sweep its
+    # summary row is the baseline; otherwise the runs start now and overlap the sweep
+    # (nogil kernel, so a couple of extra threads run truly in parallel).
+    pv_mws = list(dict.fromkeys(pv_mw for _, pv_mw in pv_cases))
+    reuse_sweep = 0.0 in bess_sizes
+    with ThreadPoolExecutor(max_workers=len(pv_mws) or 1) as pool:
+        futures = {} if reuse_sweep else {
+            f"{int(pv_mw)} MW": pool.submit(run_dispatch, pv_raw, wind_raw, 0.0, cfg, pv_scale=pv_mw / pv_ref_mw)
+            for pv_mw in pv_mws
+        }
+
+        pv_results = run_pv_sensitivity(
+            pv_raw, wind_raw, list(bess_sizes), cfg,
+            dict(pv_cases), pv_ref_mw, progress_cb
+        )
+
+        status.text("📊 Running baseline scenario (no battery)...")
+        baseline = {}
+        for lbl, pv_mw in pv_cases:
+            key = f"{int(pv_mw)} MW"
+            if reuse_sweep:
+                summary = pv_results[lbl]['summary']
+                baseline[key] = summary.loc[summary['bess_size_mwh'] == 0.0].to_dict('records')[0]
+            else:
+                baseline[key] = futures[key].result()[1]
+
+    # Hourly frames are kept as Arrow tables; callers materialize pandas per view
+    for data in pv_results.values():
+        data['hourly'] = {bess: _to_arrow(df) for bess, df in data['hourly'].items()}
+
+    pbar.progress(100)
+    status.text("✅ Analysis complete!")
+    return pv_results, baseline
+
+
+@st.cache_resource
+def _excel_pool():
+    return ThreadPoolExecutor(max_workers=2)
+
+
+def _log_warm_up_failure(future):
+    exc = future.exception()
+    if exc is not None:
+        logging.getLogger(__name__).error("Dispatch kernel warm-up failed", exc_info=exc)
+
+
+@st.cache_resource(show_spinner=False)
+def _warm_kernel():
+    """Compile/load the dispatch kernel once per process on its own thread, not the Excel pool."""
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='kernel-warm-up')
+    future = pool.submit(warm_up)
+    future.add_done_callback(_log_warm_up_failure)
+    pool.shutdown(wait=False)
+    return future
+
+
+def _write_workbook(sheets: dict) -> bytes:
+    """
+    Stream {sheet_name: DataFrame} into an xlsx row by row.
+    Row order lets xlsxwriter run in constant_memory mode (to_excel and write_column
+    write by column, which constant_memory silently drops).
+    """
+    import xlsxwriter
+
+    out = BytesIO()
+    wb = xlsxwriter.Workbook(out, {'constant_memory': True, 'nan_inf_to_errors': True})
+    for name, df in sheets.items():
+        ws = wb.add_worksheet(name)
+        ws.write_row(0, 0, list(df.columns))
+        # Each column boxed to Python scalars in one tolist() call, then zipped into rows
+        rows = zip(*(df[col].tolist() for col in df.columns))
+        for r, row in enumerate(rows, start=1):
+            ws.write_row(r, 0, row)
+    wb.close()
+    return out.getvalue()
+
+
+def _build_excel(summary_tbl, pv_results) -> bytes:
+    """Build the results workbook; runs on _excel_pool, so no st.* calls here."""
+    sheets = {'Summary': summary_tbl}
+
+    # Export 500 MWh hourly for all PV cases
+    for pv_label, data in pv_results.items():
+        if 500.0 in data['hourly']:
+            hourly = data['hourly'][500.0].to_pandas()
+            # float32 storage -> float64 rounded to 1 kW so cells don't show float32 noise
+            floats = hourly.select_dtypes(np.float32).columns
+            hourly[floats] = hourly[floats].astype(np.float64).round(3)
+            sheets[f"{pv_label.replace(' ', '_')}_500MWh"[:31]] = hourly
+
+    # Export full summary per PV case
+    for pv_lbl, data in pv_results.items():
+        sheets[pv_lbl[:28].replace(' ', '_')] = data['summary']
+
+    return _write_workbook(sheets)
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _cached_cf_chart(sweep_key: tuple, _pv_results: dict):
+    """CF vs BESS figure per sweep; keyed on sweep_key so the summaries aren't re-hashed."""
+    from firm_power_charts import chart_cf_vs_bess
+    return chart_cf_vs_bess(_pv_results)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _cached_summary_table(sweep_key: tuple, _pv_results: dict):
+    from firm_power_charts import build_summary_table
+    return build_summary_table(_pv_results)
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _cached_dispatch_chart(sweep_key: tuple, pv_choice: str, bess: float, start: int,
+                           title_text: str, elec_mw: float, _hourly_tbl):
+    """One day's figure per scenario; the 24-row slice is only built on a miss."""
+    from firm_power_charts import chart_dispatch_profile
+    day_df = _hourly_tbl.slice(start, 24).to_pandas()
+    return chart_dispatch_profile(day_df, title_text, elec_mw)
+
+
 # ══════════════════════════════════════════════════════════════════════════════
 # PAGE CONFIG
 # ══════════════════════════════════════════════════════════════════════════════
@@ -29,138 +261,148 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+_warm_kernel()
 
 # Complete CSS fix for all dark mode elements
-st.markdown("""
-<style>
-    /* ========== FORCE LIGHT THEME EVERYWHERE ========== */
-    
-    /* Main app and sidebar backgrounds */
-    .stApp {
-        background-color: #f5f7fa !important;
-    }
-    section[data-testid="stSidebar"] {
-        background-color: #ffffff !important;
-    }
-    
-    /* Top header bar (above title) */
-    header[data-testid="stHeader"] {
-        background-color: #ffffff !important;
-    }
-    
-    /* All text dark */
-    .stApp, .stApp * {
-        color: #262730 !important;
-    }
-    
-    /* ========== SIDEBAR INPUT FIELDS ========== */
-    
-    /* Text areas */
-    section[data-testid="stSidebar"] textarea,
-    section[data-testid="stSidebar"] .stTextArea textarea,
-    section[data-testid="stSidebar"] .stTextArea > div > div {
-        background-color: #ffffff !important;
-        color: #262730 !important;
-        border: 1px solid #d0d0d0 !important;
-    }
-    
-    /* Number inputs */
-    section[data-testid="stSidebar"] input[type="number"],
-    section[data-testid="stSidebar"] .stNumberInput input,
-    section[data-testid="stSidebar"] .stNumberInput > div > div > input {
-        background-color: #ffffff !important;
-        color: #262730 !important;
-        border: 1px solid #d0d0d0 !important;
-    }
-    
-    /* Number input +/- buttons */
-    section[data-testid="stSidebar"] .stNumberInput button,
-    section[data-testid="stSidebar"] button[kind="secondary"] {
-        background-color: #f0f2f6 !important;
-        color: #262730 !important;
-        border: 1px solid #d0d0d0 !important;
-    }
-    
-    /* Text inputs */
-    section[data-testid="stSidebar"] .stTextInput input,
-    section[data-testid="stSidebar"] input[type="text"] {
-        background-color: #ffffff !important;
-        color: #262730 !important;
-        border: 1px solid #d0d0d0 !important;
-    }
-    
-    /* ========== FILE UPLOADER ========== */
-    
-    section[data-testid="stSidebar"] .stFileUploader,
-    section[data-testid="stSidebar"] .stFileUploader > div,
-    section[data-testid="stSidebar"] [data-testid="stFileUploadDropzone"] {
-        background-color: #f0f2f6 !important;
-        border: 2px dashed #d0d0d0 !important;
-    }
-    
-    section[data-testid="stSidebar"] .stFileUploader section {
-        background-color: #f0f2f6 !important;
-    }
-    
-    section[data-testid="stSidebar"] .stFileUploader button {
-        background-color: #ffffff !important;
-        color: #262730 !important;
-        border: 1px solid #d0d0d0 !important;
-    }
-    
-    /* ========== EXPANDER HEADERS ========== */
-    
-    section[data-testid="stSidebar"] .streamlit-expanderHeader,
-    section[data-testid="stSidebar"] details summary {
-        background-color: #e8eaf0 !important;
-        color: #262730 !important;
-        border: 1px solid #d0d0d0 !important;
-        border-radius: 4px !important;
-    }
-    
-    section[data-testid="stSidebar"] details {
-        border: none !important;
-    }
-    
-    /* ========== ENSURE ALL BUTTONS ARE LIGHT ========== */
-    
-    section[data-testid="stSidebar"] button {
-        background-color: #f0f2f6 !important;
-        color: #262730 !important;
-    }
-    
-    section[data-testid="stSidebar"] button:hover {
-        background-color: #e0e2e6 !important;
-    }
-    
-    /* ========== FIX SELECTBOXES/DROPDOWNS ========== */
-    
-    .stSelectbox > div > div {
-        background-color: #ffffff !important;
-        color: #262730 !important;
-    }
-    
-    /* ========== FIX DATAFRAME TABLE ========== */
-    
-    .stDataFrame {
-        background-color: #ffffff !important;
-    }
-    
-    .stDataFrame table {
-        background-color: #ffffff !important;
-    }
-    
-    .stDataFrame th {
-        background-color: #f0f2f6 !important;
-        color: #262730 !important;
-    }
-    
-    .stDataFrame td {
-        background-color: #ffffff !important;
-        color: #262730 !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+@st.cache_resource
+def _app_css() -> str:
+    """Light-theme overrides, minified once per process (re-sent on every rerun)."""
+    css = """
+    <style>
+        /* ========== FORCE LIGHT THEME EVERYWHERE ========== */
+    
+        /* Main app and sidebar backgrounds */
+        .stApp {
+            background-color: #f5f7fa !important;
+        }
+        section[data-testid="stSidebar"] {
+            background-color: #ffffff !important;
+        }
+    
+        /* Top header bar (above title) */
+        header[data-testid="stHeader"] {
+            background-color: #ffffff !important;
+        }
+    
+        /* All text dark */
+        .stApp, .stApp * {
+            color: #262730 !important;
+        }
+    
+        /* ========== SIDEBAR INPUT FIELDS ========== */
+    
+        /* Text areas */
+        section[data-testid="stSidebar"] textarea,
+        section[data-testid="stSidebar"] .stTextArea textarea,
+        section[data-testid="stSidebar"] .stTextArea > div > div {
+            background-color: #ffffff !important;
+            color: #262730 !important;
+            border: 1px solid #d0d0d0 !important;
+        }
+    
+        /* Number inputs */
+        section[data-testid="stSidebar"] input[type="number"],
+        section[data-testid="stSidebar"] .stNumberInput input,
+        section[data-testid="stSidebar"] .stNumberInput > div > div > input {
+            background-color: #ffffff !important;
+            color: #262730 !important;
+            border: 1px solid #d0d0d0 !important;
+        }
+    
+        /* Number input +/- buttons */
+        section[data-testid="stSidebar"] .stNumberInput button,
+        section[data-testid="stSidebar"] button[kind="secondary"] {
+            background-color: #f0f2f6 !important;
+            color: #262730 !important;
+            border: 1px solid #d0d0d0 !important;
+        }
+    
+        /* Text inputs */
+        section[data-testid="stSidebar"] .stTextInput input,
+        section[data-testid="stSidebar"] input[type="text"] {
+            background-color: #ffffff !important;
+            color: #262730 !important;
+            border: 1px solid #d0d0d0 !important;
+        }
+    
+        /* ========== FILE UPLOADER ========== */
+    
+        section[data-testid="stSidebar"] .stFileUploader,
+        section[data-testid="stSidebar"] .stFileUploader > div,
+        section[data-testid="stSidebar"] [data-testid="stFileUploadDropzone"] {
+            background-color: #f0f2f6 !important;
+            border: 2px dashed #d0d0d0 !important;
+        }
+    
+        section[data-testid="stSidebar"] .stFileUploader section {
+            background-color: #f0f2f6 !important;
+        }
+    
+        section[data-testid="stSidebar"] .stFileUploader button {
+            background-color: #ffffff !important;
+            color: #262730 !important;
+            border: 1px solid #d0d0d0 !important;
+        }
+    
+        /* ========== EXPANDER HEADERS ========== */
+    
+        section[data-testid="stSidebar"] .streamlit-expanderHeader,
+        section[data-testid="stSidebar"] details summary {
+            background-color: #e8eaf0 !important;
+            color: #262730 !important;
+            border: 1px solid #d0d0d0 !important;
+            border-radius: 4px !important;
+        }
+    
+        section[data-testid="stSidebar"] details {
+            border: none !important;
+        }
+    
+        /* ========== ENSURE ALL BUTTONS ARE LIGHT ========== */
+    
+        section[data-testid="stSidebar"] button {
+            background-color: #f0f2f6 !important;
+            color: #262730 !important;
+        }
+    
+        section[data-testid="stSidebar"] button:hover {
+            background-color: #e0e2e6 !important;
+        }
+    
+        /* ========== FIX SELECTBOXES/DROPDOWNS ========== */
+    
+        .stSelectbox > div > div {
+            background-color: #ffffff !important;
+            color: #262730 !important;
+        }
+    
+        /* ========== FIX DATAFRAME / SUMMARY st.table ========== */
+    
+        .stDataFrame, .stTable {
+            background-color: #ffffff !important;
+        }
+    
+        .stDataFrame table, .stTable table {
+            background-color: #ffffff !important;
+        }
+    
+        .stDataFrame th, .stTable th {
+            background-color: #f0f2f6 !important;
+            color: #262730 !important;
+        }
+    
+        .stDataFrame td, .stTable td {
+            background-color: #ffffff !important;
+            color: #262730 !important;
+        }
+    </style>
+"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    css = re.sub(r'\s*([{}:;,>])\s*', r'\1', re.sub(r'\s+', ' ', css))
+    return css.strip()
+
+
+st.markdown(_app_css(), unsafe_allow_html=True)
 
 # ══════════════════════════════════════════════════════════════════════════════
 # SJ LOGO + HEADER
@@ -206,14 +448,7 @@ with st.sidebar:
             height=80,
             help="Define multiple PV capacity cases for sensitivity analysis"
         )
-        pv_cases = {}
-        for line in pv_case_input.strip().splitlines():
-            if ':' in line:
-                label, mw = line.split(':', 1)
-                try:
-                    pv_cases[label.strip()] = float(mw.strip())
-                except ValueError:
-                    pass
+        pv_cases = dict(_parse_pv_cases(pv_case_input))
         if not pv_cases:
             pv_cases = {"1000 MW PV": 1000.0, "500 MW PV": 500.0}
         
@@ -281,9 +516,9 @@ with st.sidebar:
             help="Define BESS energy capacity scenarios to analyze"
         )
         try:
-            bess_sizes = [float(x.strip()) for x in bess_input.split(',') if x.strip()]
+            bess_sizes = _parse_sizes(bess_input)
         except ValueError:
-            bess_sizes = [500, 1000, 1500, 2000, 2250, 2500, 3000, 3500]
+            bess_sizes = (500.0, 1000.0, 1500.0, 2000.0, 2250.0, 2500.0, 3000.0, 3500.0)
             st.error("Invalid - using defaults")
         
         st.markdown("**BESS Parameters**")
@@ -413,15 +648,11 @@ with tab_run:
     
     if run_btn:
         try:
-            def read_profile(f):
-                df = pd.read_csv(f) if f.name.endswith('.csv') else pd.read_excel(f)
-                num_cols = df.select_dtypes(include=[np.number]).columns
-                series = df[num_cols[1]] if len(num_cols) > 1 else df[num_cols[0]]
-                return series.values[:8760].astype(float)
-            
             with st.spinner("📊 Reading profiles..."):
-                pv_raw = read_profile(pv_file)
-                wind_raw = read_profile(wind_file)
+                pv_key = _profile_key(pv_file)
+                wind_key = _profile_key(wind_file)
+                pv_raw = _parse_profile(*pv_key, pv_file.getvalue())
+                wind_raw = _parse_profile(*wind_key, wind_file.getvalue())
             
             st.success(f"✓ PV: {len(pv_raw):,} hrs | Max: {pv_raw.max():.1f} MW | Mean: {pv_raw.mean():.1f} MW")
             st.success(f"✓ Wind: {len(wind_raw):,} hrs | Max: {wind_raw.max():.1f} MW | Mean: {wind_raw.mean():.1f} MW")
@@ -437,37 +668,17 @@ with tab_run:
             )
             
             total_runs = len(bess_sizes) * len(pv_cases)
-            pbar = st.progress(0)
-            status = st.empty()
-            run_count = [0]
-            
-            def progress_cb(idx, total, bess_sz):
-                run_count[0] += 1
-                pct = int(run_count[0] / total_runs * 100)
-                pbar.progress(pct)
-                status.text(f"⚙️ Testing battery size {int(bess_sz):,} MWh... ({run_count[0]}/{total_runs})")
-            
-            pv_results = run_pv_sensitivity(
-                pv_raw, wind_raw, bess_sizes, cfg,
-                pv_cases, pv_ref_mw, progress_cb
+            sweep_key = ((pv_key, wind_key), bess_sizes, tuple(pv_cases.items()), pv_ref_mw, astuple(cfg))
+            pv_results, baseline = _cached_sweep(
+                sweep_key[0], pv_raw, wind_raw, *sweep_key[1:]
             )
             
-            status.text("📊 Running baseline scenario (no battery)...")
-            baseline = {}
-            for lbl, pv_mw in pv_cases.items():
-                scale = pv_mw / pv_ref_mw
-                _, summary = run_dispatch(pv_raw * scale, wind_raw, 0.0, cfg)
-                baseline[f"{int(pv_mw)} MW"] = summary
-            
-            pbar.progress(100)
-            status.text("✅ Analysis complete!")
-            
             st.session_state.pv_results = pv_results
+            st.session_state.sweep_key = sweep_key
+            for stale in ('excel_ready', 'excel_future'):
+                st.session_state.pop(stale, None)
             st.session_state.baseline = baseline
             st.session_state.analysis_complete = True
-            st.session_state.hourly_cache = {
-                lbl: data['hourly'] for lbl, data in pv_results.items()
-            }
             
             st.success(f"✅ **Analysis Complete!** {total_runs} scenarios processed")
             st.balloons()
@@ -506,62 +717,68 @@ with tab_results:
         # ══════════════════════════════════════════════════════════════════════
         st.subheader("📈 System Performance vs Battery Size")
         st.caption("How capacity factor improves with larger battery storage for different solar capacities")
-        fig_cf = chart_cf_vs_bess(pv_results)
+        fig_cf = _cached_cf_chart(st.session_state.sweep_key, pv_results)
         st.plotly_chart(fig_cf, use_container_width=True, key='chart_cf_vs_bess')
         
         st.markdown("---")
         
         # Summary table with light background
         st.subheader("📋 Detailed Results Table")
-        summary_tbl = build_summary_table(pv_results)
-        st.dataframe(
-            summary_tbl,
-            use_container_width=True,
-            hide_index=True,
-            key='summary_table'
+        summary_tbl = _cached_summary_table(st.session_state.sweep_key, pv_results)
+        # Small and static: st.table renders plain HTML instead of the interactive Arrow grid
+        st.table(
+            summary_tbl.style.hide(axis='index').format({
+                'BESS Size (MWh)': '{:,.0f}',
+                'Capacity Factor (%)': '{:.2f}',
+                'Curtailment (%)': '{:.2f}',
+                'Total H2 (tonnes/yr)': '{:,.1f}',
+                'Total Energy (MWh/yr)': '{:,.1f}',
+            })
         )
         
         st.markdown("---")
         
-        # Excel export
+        # Excel export (built on a worker thread so the UI stays responsive)
         st.subheader("📥 Download Results")
-        col1, col2, col3 = st.columns([2, 1, 2])
-        with col2:
-            if st.button("📥 Prepare Excel", type="primary", use_container_width=True, key="prepare_excel_btn"):
-                with st.spinner("Building Excel report..."):
-                    out = BytesIO()
-                    with pd.ExcelWriter(out, engine='openpyxl') as writer:
-                        summary_tbl.to_excel(writer, sheet_name='Summary', index=False)
-                        
-                        # Export 500 MWh hourly for all PV cases
-                        hourly_cache = st.session_state.get('hourly_cache', {})
-                        for pv_label in hourly_cache.keys():
-                            if 500.0 in hourly_cache[pv_label]:
-                                df_500 = hourly_cache[pv_label][500.0]
-                                sheet_name = f"{pv_label.replace(' ', '_')}_500MWh"[:31]
-                                df_500.to_excel(writer, sheet_name=sheet_name, index=False)
-                        
-                        # Export full summary per PV case
-                        for pv_lbl, data in pv_results.items():
-                            sheet = pv_lbl[:28].replace(' ', '_')
-                            data['summary'].to_excel(writer, sheet_name=sheet, index=False)
-                    
-                    out.seek(0)
-                    st.session_state['excel_ready'] = out
-                    st.success("✅ Excel report ready for download")
         
-        if 'excel_ready' in st.session_state:
+        def excel_download():
+            future = st.session_state.get('excel_future')
+            if future is not None and future.done():
+                del st.session_state['excel_future']
+                st.session_state['excel_ready'] = future.result()
+                st.rerun()
+            
             col1b, col2b, col3b = st.columns([2, 1, 2])
             with col2b:
-                st.download_button(
-                    "⬇️ Download Excel",
-                    data=st.session_state['excel_ready'],
-                    file_name="firm_power_analysis.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    use_container_width=True,
-                    type="secondary",
-                    key="download_excel_btn"
-                )
+                if future is not None:
+                    st.caption("⏳ Building Excel report...")
+                elif 'excel_ready' in st.session_state:
+                    st.download_button(
+                        "⬇️ Download Excel",
+                        data=st.session_state['excel_ready'],
+                        file_name="firm_power_analysis.xlsx",
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        use_container_width=True,
+                        type="secondary",
+                        key="download_excel_btn"
+                    )
+        
+        # Prepare click reruns only this fragment, not the charts and table above it.
+        # The nested download fragment is re-registered on that rerun, which arms its polling.
+        @st.fragment
+        def excel_export(summary_tbl, pv_results):
+            col1, col2, col3 = st.columns([2, 1, 2])
+            with col2:
+                if st.button("📥 Prepare Excel", type="primary", use_container_width=True, key="prepare_excel_btn"):
+                    st.session_state.pop('excel_ready', None)
+                    st.session_state['excel_future'] = _excel_pool().submit(
+                        _build_excel, summary_tbl, pv_results
+                    )
+            
+            # Poll only while a build is pending; the download click also reruns just this fragment
+            st.fragment(run_every=0.5 if 'excel_future' in st.session_state else None)(excel_download)()
+        
+        excel_export(summary_tbl, pv_results)
 
 # ══════════════════════════════════════════════════════════════════════════════
 # TAB 4: DISPATCH PROFILES
@@ -572,69 +789,72 @@ with tab_dispatch:
     else:
         st.header("📈 Hourly Dispatch Profiles")
         
-        hourly_cache = st.session_state.get('hourly_cache', {})
-        if not hourly_cache:
+        pv_results = st.session_state.pv_results
+        if not pv_results:
             st.warning("No hourly data available")
         else:
-            col1, col2 = st.columns(2)
-            with col1:
-                pv_choice = st.selectbox(
-                    "Solar PV Scenario:",
-                    list(hourly_cache.keys()),
-                    key='dispatch_pv_choice'
+            # Selectbox changes rerun only this fragment, not the whole script
+            @st.fragment
+            def dispatch_view(pv_results, firm_mw):
+                col1, col2 = st.columns(2)
+                with col1:
+                    pv_choice = st.selectbox(
+                        "Solar PV Scenario:",
+                        list(pv_results.keys()),
+                        key='dispatch_pv_choice'
+                    )
+                with col2:
+                    bess_choice = st.selectbox(
+                        "Battery Size:",
+                        sorted(pv_results[pv_choice]['hourly'].keys()),
+                        format_func=lambda x: f"{int(x):,} MWh",
+                        key='dispatch_bess_choice'
+                    )
+                
+                data = pv_results[pv_choice]
+                typical_start, low_start = data['rep_days'][bess_choice]
+                hourly_tbl = data['hourly'][bess_choice]
+                scenario = (st.session_state.sweep_key, pv_choice, bess_choice)
+                
+                st.subheader("📅 Typical Day Profile")
+                fig_typ = _cached_dispatch_chart(
+                    *scenario, typical_start,
+                    f"Typical Day — {pv_choice} | {int(bess_choice):,} MWh Battery",
+                    firm_mw, hourly_tbl
                 )
-            with col2:
-                bess_choice = st.selectbox(
-                    "Battery Size:",
-                    sorted(hourly_cache[pv_choice].keys()),
-                    format_func=lambda x: f"{int(x):,} MWh",
-                    key='dispatch_bess_choice'
+                st.plotly_chart(fig_typ, use_container_width=True, key='chart_dispatch_typical')
+                st.caption("Representative day with median renewable energy generation")
+                
+                st.markdown("---")
+                
+                st.subheader("⚠️ Challenging Day Profile")
+                fig_low = _cached_dispatch_chart(
+                    *scenario, low_start,
+                    f"Challenging Day — {pv_choice} | {int(bess_choice):,} MWh Battery",
+                    firm_mw, hourly_tbl
                 )
-            
-            hourly_df = hourly_cache[pv_choice][bess_choice]
-            typical, low = get_representative_days(hourly_df)
-            
-            st.subheader("📅 Typical Day Profile")
-            fig_typ = chart_dispatch_profile(
-                typical,
-                f"Typical Day — {pv_choice} | {int(bess_choice):,} MWh Battery",
-                elec_mw
-            )
-            st.plotly_chart(fig_typ, use_container_width=True, key='chart_dispatch_typical')
-            st.caption("Representative day with median renewable energy generation")
-            
-            st.markdown("---")
-            
-            st.subheader("⚠️ Challenging Day Profile")
-            fig_low = chart_dispatch_profile(
-                low,
-                f"Challenging Day — {pv_choice} | {int(bess_choice):,} MWh Battery",
-                elec_mw
-            )
-            st.plotly_chart(fig_low, use_container_width=True, key='chart_dispatch_low')
-            st.caption("Day with low renewable energy generation (10th percentile) — shows system limitations")
-            
-            st.markdown("---")
-            
-            # Operational stats
-            st.subheader("⚡ Operating Statistics")
-            mode_counts = hourly_df['Operation_Mode'].value_counts()
-            met = {
-                'FIRM': mode_counts.get('FIRM', 0),
-                'SUPPLEMENTAL': mode_counts.get('SUPPLEMENTAL', 0),
-                'SHUTDOWN': mode_counts.get('SHUTDOWN', 0),
-            }
-            
-            c1, c2, c3, c4 = st.columns(4)
-            with c1:
-                st.metric("Full Power Hours", f"{met['FIRM']:,}", f"{met['FIRM']/8760*100:.1f}%")
-            with c2:
-                st.metric("Reduced Power Hours", f"{met['SUPPLEMENTAL']:,}", f"{met['SUPPLEMENTAL']/8760*100:.1f}%")
-            with c3:
-                st.metric("Standby Hours", f"{met['SHUTDOWN']:,}", f"{met['SHUTDOWN']/8760*100:.1f}%")
-            with c4:
-                cf_avg = hourly_df['Capacity_Factor_%'].mean()
-                st.metric("Average Capacity Factor", f"{cf_avg:.2f}%")
+                st.plotly_chart(fig_low, use_container_width=True, key='chart_dispatch_low')
+                st.caption("Day with low renewable energy generation (10th percentile) — shows system limitations")
+                
+                st.markdown("---")
+                
+                # Operational stats
+                st.subheader("⚡ Operating Statistics")
+                counts = data['mode_counts'][bess_choice]
+                pct = counts * (100.0 / hourly_tbl.num_rows)
+                
+                c1, c2, c3, c4 = st.columns(4)
+                with c1:
+                    st.metric("Full Power Hours", f"{counts[MODE_FIRM]:,}", f"{pct[MODE_FIRM]:.1f}%")
+                with c2:
+                    st.metric("Reduced Power Hours", f"{counts[MODE_SUPPLEMENTAL]:,}", f"{pct[MODE_SUPPLEMENTAL]:.1f}%")
+                with c3:
+                    st.metric("Standby Hours", f"{counts[MODE_SHUTDOWN]:,}", f"{pct[MODE_SHUTDOWN]:.1f}%")
+                with c4:
+                    cf_avg = data['cf_mean'][bess_choice]
+                    st.metric("Average Capacity Factor", f"{cf_avg:.2f}%")
+
+            dispatch_view(pv_results, elec_mw)
 
 # Footer
 st.markdown("---")
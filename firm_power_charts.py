@@ -2,18 +2,67 @@
 FIRM POWER CHARTS v3.1
 ======================
 Fixed: Proper System Scaling Analysis logic + readable axis text
+Perf: dispatch profile and CF sweep drawn with WebGL (Scattergl) traces
 """
 
+from types import MappingProxyType
+
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import numpy as np
 import pandas as pd
 
-COLORS = {
+COLORS = MappingProxyType({
     'pv_1000': '#1565C0', 'pv_500': '#42A5F5',
     'pv': '#000000', 'wind': '#1E90FF', 'hydro': '#FFD700', 'bess': '#10B981',
     'cf_line': '#FF6F00',
+})
+# Read-only palette; chart code uses these names directly
+PV_1000_COLOR, PV_500_COLOR, PV_COLOR, WIND_COLOR, HYDRO_COLOR, BESS_COLOR, CF_LINE_COLOR = (
+    COLORS[k] for k in ('pv_1000', 'pv_500', 'pv', 'wind', 'hydro', 'bess', 'cf_line'))
+
+# Shared style blocks; Plotly copies these into each figure, so one instance serves every chart
+TITLE_FONT = {'size': 18, 'color': '#1976D2', 'family': 'Arial'}
+AXIS_TITLE_FONT = {'size': 14, 'color': '#000000', 'family': 'Arial'}
+TICK_FONT = {'size': 12, 'color': '#000000', 'family': 'Arial'}
+LEGEND_BELOW = {'orientation': 'h', 'yanchor': 'bottom', 'y': -0.25, 'xanchor': 'center', 'x': 0.5,
+                'font': TICK_FONT}
+LEGEND_BELOW_FAR = {**LEGEND_BELOW, 'y': -0.3}
+BAR_LABEL_FONT = {'size': 11, 'color': 'white', 'family': 'Arial'}
+BAR_LABEL_FONT_DARK = {**BAR_LABEL_FONT, 'color': 'black'}
+
+# Same axes make_subplots(specs=[[{"secondary_y": True}]]) lays out, without its subplot-grid setup;
+# traces opt into the right-hand axis with yaxis='y2'
+DUAL_AXIS_LAYOUT = {
+    'xaxis': {'anchor': 'y', 'domain': [0.0, 0.94]},
+    'yaxis': {'anchor': 'x', 'domain': [0.0, 1.0]},
+    'yaxis2': {'anchor': 'x', 'overlaying': 'y', 'side': 'right'},
 }
 
+# Shared template for the dispatch profile's static layout; go.Figure copies (and revalidates) it per call
+DISPATCH_LAYOUT = go.Layout(
+    xaxis={**DUAL_AXIS_LAYOUT['xaxis'],
+           'title': {'text': '<b>Hours</b>', 'font': AXIS_TITLE_FONT},
+           'tickmode': 'linear', 'tick0': 0, 'dtick': 2, 'range': [0, 24],
+           'showgrid': True, 'gridcolor': '#E0E0E0',
+           'tickfont': TICK_FONT},
+    yaxis={**DUAL_AXIS_LAYOUT['yaxis'],
+           'title': {'text': '<b>Power (MW)</b>', 'font': AXIS_TITLE_FONT},
+           'showgrid': True, 'gridcolor': '#E0E0E0',
+           'tickfont': TICK_FONT},
+    yaxis2={**DUAL_AXIS_LAYOUT['yaxis2'],
+            'title': {'text': '<b>BESS SOC (%)</b>', 'font': AXIS_TITLE_FONT},
+            'range': [0, 120], 'showgrid': False,
+            'tickfont': TICK_FONT},
+    title_x=0.5,
+    plot_bgcolor='white', paper_bgcolor='white',
+    height=500, hovermode='x unified',
+    legend=LEGEND_BELOW,
+    margin={'l': 80, 'r': 80, 't': 80, 'b': 100}
+)
+
+# Per-point text labels are one SVG node each; past this many points they clutter and slow rendering
+TEXT_LABEL_MAX_POINTS = 20
+
 
 def chart_cf_vs_bess(pv_results: dict):
     """Chart 1: System Performance vs Battery Size"""
@@ -21,32 +70,32 @@ def chart_cf_vs_bess(pv_results: dict):
     
     for label, data in pv_results.items():
         df = data['summary'].copy().sort_values('bess_size_mwh')
-        color = COLORS['pv_1000'] if '1000' in label else COLORS['pv_500']
+        color = PV_1000_COLOR if '1000' in label else PV_500_COLOR
+        labelled = len(df) <= TEXT_LABEL_MAX_POINTS
         
-        fig.add_trace(go.Scatter(
-            x=df['bess_size_mwh'], y=df['firm_cf_pct'],
-            mode='lines+markers+text', name=label,
+        fig.add_trace(go.Scattergl(
+            x=df['bess_size_mwh'].to_numpy(dtype=np.float32), y=df['firm_cf_pct'].to_numpy(dtype=np.float32),
+            mode='lines+markers+text' if labelled else 'lines+markers', name=label,
             line={'color': color, 'width': 3},
             marker={'size': 10},
-            text=[f"{val:.1f}%" for val in df['firm_cf_pct']],
+            text=np.char.mod('%.1f%%', df['firm_cf_pct'].to_numpy()) if labelled else None,
             textposition='top center',
             textfont={'size': 11, 'color': color},
             hovertemplate='<b>%{fullData.name}</b><br>BESS: %{x:,.0f} MWh<br>CF: %{y:.2f}%<extra></extra>'
         ))
     
     fig.update_layout(
-        title={'text': '<b>System Performance vs Battery Size</b>', 'font': {'size': 18, 'color': '#1976D2', 'family': 'Arial'}},
+        title={'text': '<b>System Performance vs Battery Size</b>', 'font': TITLE_FONT},
         title_x=0.5,
-        xaxis={'title': {'text': '<b>BESS Size (MWh)</b>', 'font': {'size': 14, 'color': '#000000', 'family': 'Arial'}},
+        xaxis={'title': {'text': '<b>BESS Size (MWh)</b>', 'font': AXIS_TITLE_FONT},
                'showgrid': True, 'gridcolor': '#E0E0E0', 
-               'tickfont': {'size': 12, 'color': '#000000', 'family': 'Arial'}},
-        yaxis={'title': {'text': '<b>Capacity Factor (%)</b>', 'font': {'size': 14, 'color': '#000000', 'family': 'Arial'}},
+               'tickfont': TICK_FONT},
+        yaxis={'title': {'text': '<b>Capacity Factor (%)</b>', 'font': AXIS_TITLE_FONT},
                'showgrid': True, 'gridcolor': '#E0E0E0', 'range': [80, 100],
-               'tickfont': {'size': 12, 'color': '#000000', 'family': 'Arial'}},
+               'tickfont': TICK_FONT},
         plot_bgcolor='white', paper_bgcolor='white',
         height=500, hovermode='x unified',
-        legend={'orientation': 'h', 'yanchor': 'bottom', 'y': -0.25, 'xanchor': 'center', 'x': 0.5,
-                'font': {'size': 12, 'color': '#000000', 'family': 'Arial'}},
+        legend=LEGEND_BELOW,
         margin={'l': 80, 'r': 40, 't': 80, 'b': 100}
     )
     return fig
@@ -60,166 +109,129 @@ def chart_system_scaling(pv_results: dict, elec_mw: float):
     plant components (PV, Wind, BESS) also DECREASE proportionally,
     while CF remains constant (~86%)
     """
-    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig = go.Figure(layout=DUAL_AXIS_LAYOUT)
     
     # Get the best case (highest CF) for each PV scenario
-    first_label = list(pv_results.keys())[0]
-    df = pv_results[first_label]['summary'].copy()
-    best_idx = df['firm_cf_pct'].idxmax()
-    best_row = df.loc[best_idx]
+    first_label = next(iter(pv_results))
+    df = pv_results[first_label]['summary']
+    best = df['firm_cf_pct'].to_numpy().argmax()
     
     # Base system (500 MW electrolyzer case)
     base_pv = pv_results[first_label].get('pv_mw', 1000)
     base_wind = pv_results[first_label].get('wind_mw', 1104)
-    base_bess = best_row['bess_size_mwh']
+    base_bess = df['bess_size_mwh'].to_numpy()[best]
     base_hydro = pv_results[first_label].get('hydro_mw', 250)
-    base_cf = best_row['firm_cf_pct']
-    
-    # Electrolyzer sizes (reducing from 500 to 300 MW)
-    electrolyzer_sizes = [500, 450, 400, 350, 300]
+    base_cf = df['firm_cf_pct'].to_numpy()[best]
     
-    pv_capacities = []
-    wind_capacities = []
-    bess_capacities = []
-    hydro_capacities = []
-    cf_values = []
+    # Electrolyzer sizes (reducing from 500 to 300 MW); components scale relative to base (500 MW)
+    electrolyzer_sizes = np.array([500, 450, 400, 350, 300], dtype=np.int16)
+    scale = electrolyzer_sizes / 500.0
     
-    for elec_size in electrolyzer_sizes:
-        # Scale factor relative to base (500 MW)
-        scale = elec_size / 500.0
-        
-        pv_capacities.append(base_pv * scale)
-        wind_capacities.append(base_wind * scale)
-        bess_capacities.append(base_bess * scale)
-        hydro_capacities.append(base_hydro * scale)
-        cf_values.append(base_cf)  # CF stays constant
+    pv_capacities = base_pv * scale
+    wind_capacities = base_wind * scale
+    bess_capacities = base_bess * scale
+    hydro_capacities = base_hydro * scale
+    cf_values = np.full(scale.shape, base_cf)  # CF stays constant
     
     # Stacked bars
     fig.add_trace(go.Bar(
-        x=electrolyzer_sizes, y=pv_capacities, name='PV',
-        marker_color=COLORS['pv'], 
-        text=[f"{int(v)}" for v in pv_capacities],
-        textposition='inside', textfont={'size': 11, 'color': 'white', 'family': 'Arial'},
+        x=electrolyzer_sizes, y=pv_capacities.astype(np.float32), name='PV',
+        marker_color=PV_COLOR, 
+        text=np.char.mod('%d', pv_capacities),
+        textposition='inside', textfont=BAR_LABEL_FONT,
         hovertemplate='PV: %{y:,.0f} MW<extra></extra>'
-    ), secondary_y=False)
+    ))
     
     fig.add_trace(go.Bar(
-        x=electrolyzer_sizes, y=wind_capacities, name='Wind',
-        marker_color=COLORS['wind'],
-        text=[f"{int(v)}" for v in wind_capacities],
-        textposition='inside', textfont={'size': 11, 'color': 'white', 'family': 'Arial'},
+        x=electrolyzer_sizes, y=wind_capacities.astype(np.float32), name='Wind',
+        marker_color=WIND_COLOR,
+        text=np.char.mod('%d', wind_capacities),
+        textposition='inside', textfont=BAR_LABEL_FONT,
         hovertemplate='Wind: %{y:,.0f} MW<extra></extra>'
-    ), secondary_y=False)
+    ))
     
     fig.add_trace(go.Bar(
-        x=electrolyzer_sizes, y=bess_capacities, name='BESS',
-        marker_color=COLORS['bess'],
-        text=[f"{int(v)}" for v in bess_capacities],
-        textposition='inside', textfont={'size': 11, 'color': 'white', 'family': 'Arial'},
+        x=electrolyzer_sizes, y=bess_capacities.astype(np.float32), name='BESS',
+        marker_color=BESS_COLOR,
+        text=np.char.mod('%d', bess_capacities),
+        textposition='inside', textfont=BAR_LABEL_FONT,
         hovertemplate='BESS: %{y:,.0f} MWh<extra></extra>'
-    ), secondary_y=False)
+    ))
     
     fig.add_trace(go.Bar(
-        x=electrolyzer_sizes, y=hydro_capacities, name='Hydro',
-        marker_color=COLORS['hydro'],
-        text=[f"{int(v)}" for v in hydro_capacities],
-        textposition='inside', textfont={'size': 11, 'color': 'black', 'family': 'Arial'},
+        x=electrolyzer_sizes, y=hydro_capacities.astype(np.float32), name='Hydro',
+        marker_color=HYDRO_COLOR,
+        text=np.char.mod('%d', hydro_capacities),
+        textposition='inside', textfont=BAR_LABEL_FONT_DARK,
         hovertemplate='Hydro: %{y:,.0f} MW<extra></extra>'
-    ), secondary_y=False)
+    ))
     
     # CF line
     fig.add_trace(go.Scatter(
-        x=electrolyzer_sizes, y=cf_values, name='CF',
-        mode='lines+markers+text', line={'color': COLORS['cf_line'], 'width': 3},
+        x=electrolyzer_sizes, y=cf_values.astype(np.float32), name='CF',
+        mode='lines+markers+text', line={'color': CF_LINE_COLOR, 'width': 3},
         marker={'size': 10}, 
-        text=[f"{v:.2f}" for v in cf_values],
-        textposition='top center', textfont={'size': 10, 'color': COLORS['cf_line'], 'family': 'Arial'},
-        hovertemplate='CF: %{y:.2f}%<extra></extra>'
-    ), secondary_y=True)
-    
-    fig.update_xaxes(
-        title={'text': '<b>Electrolyzer size (MW)</b>', 'font': {'size': 14, 'color': '#000000', 'family': 'Arial'}},
-        showgrid=True, gridcolor='#E0E0E0',
-        tickfont={'size': 12, 'color': '#000000', 'family': 'Arial'}
-    )
-    fig.update_yaxes(
-        title={'text': '<b>Total renewable capacity (PV + Wind + BESS)</b>', 'font': {'size': 14, 'color': '#000000', 'family': 'Arial'}},
-        showgrid=True, gridcolor='#E0E0E0', secondary_y=False,
-        tickfont={'size': 12, 'color': '#000000', 'family': 'Arial'}
-    )
-    fig.update_yaxes(
-        title={'text': '<b>Capacity Factor %</b>', 'font': {'size': 14, 'color': '#000000', 'family': 'Arial'}},
-        showgrid=False, range=[65, 100], secondary_y=True,
-        tickfont={'size': 12, 'color': '#000000', 'family': 'Arial'}
+        text=np.char.mod('%.2f', cf_values),
+        textposition='top center', textfont={'size': 10, 'color': CF_LINE_COLOR, 'family': 'Arial'},
+        hovertemplate='CF: %{y:.2f}%<extra></extra>', yaxis='y2'
+    ))
+    
+    fig.update_layout(
+        xaxis={'title': {'text': '<b>Electrolyzer size (MW)</b>', 'font': AXIS_TITLE_FONT},
+               'showgrid': True, 'gridcolor': '#E0E0E0',
+               'tickfont': TICK_FONT},
+        yaxis={'title': {'text': '<b>Total renewable capacity (PV + Wind + BESS)</b>', 'font': AXIS_TITLE_FONT},
+               'showgrid': True, 'gridcolor': '#E0E0E0',
+               'tickfont': TICK_FONT},
+        yaxis2={'title': {'text': '<b>Capacity Factor %</b>', 'font': AXIS_TITLE_FONT},
+                'showgrid': False, 'range': [65, 100],
+                'tickfont': TICK_FONT}
     )
     
     fig.update_layout(
-        title={'text': '<b>System Scaling Analysis</b>', 'font': {'size': 18, 'color': '#1976D2', 'family': 'Arial'}},
+        title={'text': '<b>System Scaling Analysis</b>', 'font': TITLE_FONT},
         title_x=0.5,
         plot_bgcolor='white', paper_bgcolor='white',
         height=500, barmode='stack',
-        legend={'orientation': 'h', 'yanchor': 'bottom', 'y': -0.3, 'xanchor': 'center', 'x': 0.5,
-                'font': {'size': 12, 'color': '#000000', 'family': 'Arial'}},
+        legend=LEGEND_BELOW_FAR,
         margin={'l': 80, 'r': 80, 't': 80, 'b': 120}
     )
     return fig
 
 
 def chart_dispatch_profile(day_df, title_text, elec_mw):
-    """Dispatch profile"""
-    fig = make_subplots(specs=[[{"secondary_y": True}]])
-    
-    fig.add_trace(go.Scatter(
-        x=day_df['Hour_of_Day'], y=day_df['Hydro_MW'], name='Hydro',
-        mode='lines', line={'width': 0}, stackgroup='one', fillcolor='rgba(255, 107, 53, 0.7)'
-    ), secondary_y=False)
+    """Dispatch profile (WebGL traces; generation stack is cumulated here, Scattergl has no stackgroup)"""
+    hours = day_df['Hour_of_Day'].to_numpy()
     
-    fig.add_trace(go.Scatter(
-        x=day_df['Hour_of_Day'], y=day_df['PV_MW'], name='PV',
-        mode='lines', line={'width': 0}, stackgroup='one', fillcolor='rgba(76, 175, 80, 0.7)'
-    ), secondary_y=False)
+    # float32 halves the serialized trace payload (hourly tables are stored as float32 already)
+    traces = []
+    stack = np.zeros(len(day_df), dtype=np.float32)
+    for col, name, fillcolor in (('Hydro_MW', 'Hydro', 'rgba(255, 107, 53, 0.7)'),
+                                 ('PV_MW', 'PV', 'rgba(76, 175, 80, 0.7)'),
+                                 ('Wind_MW', 'Wind', 'rgba(33, 150, 243, 0.7)')):
+        values = day_df[col].to_numpy(dtype=np.float32)
+        stack = stack + values
+        traces.append({
+            'type': 'scattergl', 'x': hours, 'y': stack, 'customdata': values, 'name': name,
+            'mode': 'lines', 'line': {'width': 0}, 'fillcolor': fillcolor,
+            'fill': 'tozeroy' if name == 'Hydro' else 'tonexty',
+            'hovertemplate': '%{customdata:.1f} MW'
+        })
     
-    fig.add_trace(go.Scatter(
-        x=day_df['Hour_of_Day'], y=day_df['Wind_MW'], name='Wind',
-        mode='lines', line={'width': 0}, stackgroup='one', fillcolor='rgba(33, 150, 243, 0.7)'
-    ), secondary_y=False)
-    
-    fig.add_trace(go.Scatter(
-        x=day_df['Hour_of_Day'], y=[elec_mw] * len(day_df),
-        name='Firm Power Target', mode='lines',
-        line={'width': 3, 'color': '#FFD700', 'dash': 'dash'}
-    ), secondary_y=False)
-    
-    fig.add_trace(go.Scatter(
-        x=day_df['Hour_of_Day'], y=day_df['BESS_SOC_%'], name='BESS SOC',
-        mode='lines', line={'width': 3, 'color': '#9C27B0'}
-    ), secondary_y=True)
-    
-    fig.update_xaxes(
-        title={'text': '<b>Hours</b>', 'font': {'size': 14, 'color': '#000000', 'family': 'Arial'}},
-        tickmode='linear', tick0=0, dtick=2, range=[0, 24],
-        showgrid=True, gridcolor='#E0E0E0', 
-        tickfont={'size': 12, 'color': '#000000', 'family': 'Arial'}
-    )
-    fig.update_yaxes(
-        title={'text': '<b>Power (MW)</b>', 'font': {'size': 14, 'color': '#000000', 'family': 'Arial'}},
-        showgrid=True, gridcolor='#E0E0E0', secondary_y=False,
-        tickfont={'size': 12, 'color': '#000000', 'family': 'Arial'}
-    )
-    fig.update_yaxes(
-        title={'text': '<b>BESS SOC (%)</b>', 'font': {'size': 14, 'color': '#000000', 'family': 'Arial'}},
-        range=[0, 120], showgrid=False, secondary_y=True,
-        tickfont={'size': 12, 'color': '#000000', 'family': 'Arial'}
-    )
+    traces.append({
+        'type': 'scattergl', 'x': hours, 'y': day_df['BESS_SOC_%'].to_numpy(dtype=np.float32),
+        'name': 'BESS SOC', 'mode': 'lines', 'line': {'width': 3, 'color': '#9C27B0'}, 'yaxis': 'y2'
+    })
     
+    # Title and target line are the only per-call layout on top of the DISPATCH_LAYOUT template
+    fig = go.Figure(data=traces, layout=DISPATCH_LAYOUT)
     fig.update_layout(
-        title={'text': f'<b>{title_text}</b>', 'font': {'size': 18, 'color': '#1976D2', 'family': 'Arial'}},
-        title_x=0.5,
-        plot_bgcolor='white', paper_bgcolor='white',
-        height=500, hovermode='x unified',
-        legend={'orientation': 'h', 'yanchor': 'bottom', 'y': -0.25, 'xanchor': 'center', 'x': 0.5,
-                'font': {'size': 12, 'color': '#000000', 'family': 'Arial'}},
-        margin={'l': 80, 'r': 80, 't': 80, 'b': 100}
+        title={'text': f'<b>{title_text}</b>', 'font': TITLE_FONT},
+        # Constant target drawn as a single layout line (with its own legend entry) rather than a 24-point trace
+        shapes=[{'type': 'line', 'xref': 'x', 'yref': 'y',
+                 'x0': int(hours[0]), 'x1': int(hours[-1]), 'y0': elec_mw, 'y1': elec_mw,
+                 'line': {'width': 3, 'color': '#FFD700', 'dash': 'dash'},
+                 'name': 'Firm Power Target', 'showlegend': True}]
     )
     return fig
 
@@ -231,22 +243,24 @@ def chart_baseline_without_bess(baseline: dict):
     pass
 
 
+SUMMARY_COLUMNS = {
+    'bess_size_mwh': 'BESS Size (MWh)', 'firm_cf_pct': 'Capacity Factor (%)',
+    'operating_hours': 'Operating Hours', 'days_full_24h': 'Days 24h Full',
+    'curtailment_pct': 'Curtailment (%)', 'total_h2_kg': 'Total H2 (tonnes/yr)',
+    'total_energy_mwh': 'Total Energy (MWh/yr)',
+}
+
+
+SUMMARY_ROUNDING = {'Capacity Factor (%)': 2, 'Curtailment (%)': 2,
+                    'Total H2 (tonnes/yr)': 1, 'Total Energy (MWh/yr)': 1}
+
+
 def build_summary_table(pv_results: dict):
-    all_rows = []
-    for pv_label, data in pv_results.items():
-        df = data['summary'].copy()
-        df['PV Case'] = pv_label
-        df = df[['PV Case', 'bess_size_mwh', 'firm_cf_pct', 'operating_hours',
-                'days_full_24h', 'curtailment_pct', 'total_h2_kg', 'total_energy_mwh']]
-        all_rows.append(df)
-    
-    combined = pd.concat(all_rows, ignore_index=True)
-    combined.columns = ['PV Case', 'BESS Size (MWh)', 'Capacity Factor (%)', 'Operating Hours',
-                       'Days 24h Full', 'Curtailment (%)', 'Total H2 (tonnes/yr)', 'Total Energy (MWh/yr)']
-    
-    combined['Total H2 (tonnes/yr)'] = (combined['Total H2 (tonnes/yr)'] / 1000).round(1)
-    combined['Total Energy (MWh/yr)'] = combined['Total Energy (MWh/yr)'].round(1)
-    combined['Capacity Factor (%)'] = combined['Capacity Factor (%)'].round(2)
-    combined['Curtailment (%)'] = combined['Curtailment (%)'].round(2)
-    
-    return combined
+    # Each output column is one concatenation across PV cases; a single frame and one round() pass
+    summaries = [data['summary'] for data in pv_results.values()]
+    columns = {'PV Case': np.repeat(list(pv_results), [len(df) for df in summaries])}
+    for old, new in SUMMARY_COLUMNS.items():
+        columns[new] = np.concatenate([df[old].to_numpy() for df in summaries])
+    columns['Total H2 (tonnes/yr)'] = columns['Total H2 (tonnes/yr)'] / 1000
+    
+    return pd.DataFrame(columns).round(SUMMARY_ROUNDING)
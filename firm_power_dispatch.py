@@ -1,12 +1,24 @@
 """
-FIRM POWER DISPATCH ENGINE v1.2
+FIRM POWER DISPATCH ENGINE v1.3
 ================================
 Fixed: run_pv_sensitivity() signature - added pv_reference_mw parameter
+Perf: hourly dispatch loop compiled with Numba (_dispatch_kernel)
+
+Compiled kernels are cached on disk in .numba_cache/ (override with
+NUMBA_CACHE_DIR); run this module directly to warm the cache.
+Set NUMBA_DISABLE_JIT=1 to run the kernel as plain Python.
 """
 
+import os
+import pathlib
+
+os.environ.setdefault('NUMBA_CACHE_DIR', str(pathlib.Path(__file__).parent / '.numba_cache'))
+
 import numpy as np
 import pandas as pd
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, replace
+from numba import njit
 
 
 @dataclass
@@ -22,44 +34,33 @@ class SystemConfig:
     h2_conversion_factor: float = 50.0
 
 
-def run_dispatch(pv_profile, wind_profile, bess_size_mwh, config):
+MODE_LABELS = ['FIRM', 'SUPPLEMENTAL', 'SHUTDOWN']
+MODE_FIRM, MODE_SUPPLEMENTAL, MODE_SHUTDOWN = 0, 1, 2
+
+
+@njit(cache=True, nogil=True)
+def _dispatch_kernel(pv, wind, pv_scale, elec_cap, hydro_mw, bess_pwr, chg_eff, dis_eff, bess_size_mwh):
     """
-    Run single BESS scenario - exact VBA translation.
-    Returns: (hourly_df, summary_dict)
+    Hour-by-hour three-tier state machine (FIRM / SUPPLEMENTAL / SHUTDOWN).
+    Only the stateful columns are produced here; run_dispatch derives the rest.
+    PV scaling is fused into the load so no scaled copy of the profile is needed.
     """
-    n_hours = len(pv_profile)
-    assert len(wind_profile) == n_hours
+    n_hours = pv.shape[0]
+    # Every slot is written each hour, so outputs need no zero-fill
+    Electrolyzer_MW = np.empty(n_hours)
+    PV_to_Elec_MW = np.empty(n_hours)
+    Wind_to_Elec_MW = np.empty(n_hours)
+    Hydro_to_Elec_MW = np.empty(n_hours)
+    BESS_to_Elec_MW = np.empty(n_hours)
+    BESS_Charge_Before_Eff = np.empty(n_hours)
+    BESS_Charge_After_Eff = np.empty(n_hours)
+    BESS_Discharge_Before_Eff = np.empty(n_hours)
+    BESS_Discharge_After_Eff = np.empty(n_hours)
+    BESS_SOC_pct = np.empty(n_hours)
+    BESS_Capacity_MWh = np.empty(n_hours)
+    Curtailment_MW = np.empty(n_hours)
+    Mode_Code = np.empty(n_hours, dtype=np.int8)
 
-    # Pre-allocate 23 columns (matching VBA)
-    Hour = np.zeros(n_hours, dtype=int)
-    PV_MW = np.zeros(n_hours)
-    Wind_MW = np.zeros(n_hours)
-    Renewable_MW = np.zeros(n_hours)
-    Hydro_MW = np.zeros(n_hours)
-    Net_Available_MW = np.zeros(n_hours)
-    Electrolyzer_MW = np.zeros(n_hours)
-    PV_to_Elec_MW = np.zeros(n_hours)
-    Wind_to_Elec_MW = np.zeros(n_hours)
-    Hydro_to_Elec_MW = np.zeros(n_hours)
-    BESS_to_Elec_MW = np.zeros(n_hours)
-    BESS_Charge_Before_Eff = np.zeros(n_hours)
-    BESS_Charge_After_Eff = np.zeros(n_hours)
-    BESS_Charge_Loss = np.zeros(n_hours)
-    BESS_Discharge_Before_Eff = np.zeros(n_hours)
-    BESS_Discharge_After_Eff = np.zeros(n_hours)
-    BESS_Discharge_Loss = np.zeros(n_hours)
-    BESS_SOC_pct = np.zeros(n_hours)
-    BESS_Capacity_MWh = np.zeros(n_hours)
-    Curtailment_MW = np.zeros(n_hours)
-    H2_Production_kg = np.zeros(n_hours)
-    Capacity_Factor_pct = np.zeros(n_hours)
-    Operation_Mode = np.empty(n_hours, dtype=object)
-
-    elec_cap = config.electrolyzer_capacity_mw
-    hydro_mw = config.hydro_power_mw
-    bess_pwr = config.bess_max_power_mw
-    chg_eff = config.bess_charge_eff
-    dis_eff = config.bess_discharge_eff
     bess_max = bess_size_mwh
     bess_enabled = bess_max > 0
 
@@ -67,23 +68,16 @@ def run_dispatch(pv_profile, wind_profile, bess_size_mwh, config):
     if not bess_enabled:
         bess_max = 1e-6
 
-    total_energy_mwh = 0.0
-    hours_full = hours_partial = hours_shutdown = 0
-    h2_from_full = h2_from_partial = 0.0
-    total_charge_loss = total_discharge_loss = total_curtailment = 0.0
-    total_renewable_generated = 0.0
-
     for h in range(n_hours):
-        pv_raw = float(pv_profile[h])
-        wind_raw = float(wind_profile[h])
+        pv_raw = pv[h] * pv_scale
+        wind_raw = float(wind[h])
         net_pv = max(0.0, pv_raw)
         renewable = net_pv + wind_raw
-        total_renewable_generated += renewable
 
         curtailment = 0.0
-        bess_in_bef = bess_in_aft = bess_chg_loss = 0.0
-        bess_out_bef = bess_out_aft = bess_dis_loss = 0.0
-        pv_to_e = wind_to_e = hydro_to_e = bess_to_e = 0.0
+        bess_in_bef = bess_in_aft = 0.0
+        bess_out_bef = bess_out_aft = 0.0
+        pv_to_e = wind_to_e = bess_to_e = 0.0
 
         hydro_to_e = min(elec_cap, hydro_mw)
         power_shortfall = elec_cap - hydro_to_e
@@ -102,7 +96,6 @@ def run_dispatch(pv_profile, wind_profile, bess_size_mwh, config):
                     avail_space = bess_max - bess_capacity
                     bess_in_bef = min(remaining, bess_pwr, avail_space / chg_eff)
                     bess_in_aft = bess_in_bef * chg_eff
-                    bess_chg_loss = bess_in_bef - bess_in_aft
                     bess_capacity += bess_in_aft
                     curtailment = remaining - bess_in_bef
                 else:
@@ -114,65 +107,41 @@ def run_dispatch(pv_profile, wind_profile, bess_size_mwh, config):
                 if bess_enabled:
                     bess_out_bef = min(add_shortfall / dis_eff, bess_capacity)
                     bess_out_aft = bess_out_bef * dis_eff
-                    bess_dis_loss = bess_out_bef - bess_out_aft
                     bess_capacity -= bess_out_bef
                     bess_to_e = bess_out_aft
                 electrolyzer_mw = elec_cap
                 curtailment = 0.0
-            operation_mode = "FIRM"
-            hours_full += 1
-            h2_from_full += (electrolyzer_mw * 1000.0 / config.h2_conversion_factor)
+            mode = MODE_FIRM
 
         elif hydro_mw >= 250.0:
             # SUPPLEMENTAL
             electrolyzer_mw = 250.0
             hydro_to_e = 250.0
-            pv_to_e = wind_to_e = bess_to_e = 0.0
             if bess_enabled and renewable > 0 and bess_capacity < bess_max:
                 avail_space = bess_max - bess_capacity
                 bess_in_bef = min(renewable, bess_pwr, avail_space / chg_eff)
                 bess_in_aft = bess_in_bef * chg_eff
-                bess_chg_loss = bess_in_bef - bess_in_aft
                 bess_capacity += bess_in_aft
                 curtailment = renewable - bess_in_bef
             else:
                 curtailment = renewable
-            operation_mode = "SUPPLEMENTAL"
-            hours_partial += 1
-            h2_from_partial += (electrolyzer_mw * 1000.0 / config.h2_conversion_factor)
+            mode = MODE_SUPPLEMENTAL
 
         else:
             # SHUTDOWN
             electrolyzer_mw = 0.0
-            hydro_to_e = pv_to_e = wind_to_e = bess_to_e = 0.0
+            hydro_to_e = 0.0
             total_avail = hydro_mw + renewable
             if bess_enabled and total_avail > 0 and bess_capacity < bess_max:
                 avail_space = bess_max - bess_capacity
                 bess_in_bef = min(total_avail, bess_pwr, avail_space / chg_eff)
                 bess_in_aft = bess_in_bef * chg_eff
-                bess_chg_loss = bess_in_bef - bess_in_aft
                 bess_capacity += bess_in_aft
                 curtailment = total_avail - bess_in_bef
             else:
                 curtailment = total_avail
-            operation_mode = "SHUTDOWN"
-            hours_shutdown += 1
-
-        total_charge_loss += bess_chg_loss
-        total_discharge_loss += bess_dis_loss
-        total_curtailment += curtailment
-        total_energy_mwh += electrolyzer_mw
-
-        bess_soc = (bess_capacity / bess_max) * 100.0 if bess_max > 1e-5 else 0.0
-        h2_prod = electrolyzer_mw * 1000.0 / config.h2_conversion_factor
-        cf = (electrolyzer_mw / elec_cap) * 100.0 if elec_cap > 0 else 0.0
-
-        Hour[h] = h
-        PV_MW[h] = pv_raw
-        Wind_MW[h] = wind_raw
-        Renewable_MW[h] = renewable
-        Hydro_MW[h] = hydro_mw
-        Net_Available_MW[h] = electrolyzer_mw
+            mode = MODE_SHUTDOWN
+
         Electrolyzer_MW[h] = electrolyzer_mw
         PV_to_Elec_MW[h] = pv_to_e
         Wind_to_Elec_MW[h] = wind_to_e
@@ -180,16 +149,73 @@ def run_dispatch(pv_profile, wind_profile, bess_size_mwh, config):
         BESS_to_Elec_MW[h] = bess_to_e
         BESS_Charge_Before_Eff[h] = bess_in_bef
         BESS_Charge_After_Eff[h] = bess_in_aft
-        BESS_Charge_Loss[h] = bess_chg_loss
         BESS_Discharge_Before_Eff[h] = bess_out_bef
         BESS_Discharge_After_Eff[h] = bess_out_aft
-        BESS_Discharge_Loss[h] = bess_dis_loss
-        BESS_SOC_pct[h] = bess_soc
+        BESS_SOC_pct[h] = (bess_capacity / bess_max) * 100.0 if bess_max > 1e-5 else 0.0
         BESS_Capacity_MWh[h] = bess_capacity
         Curtailment_MW[h] = curtailment
-        H2_Production_kg[h] = h2_prod
-        Capacity_Factor_pct[h] = cf
-        Operation_Mode[h] = operation_mode
+        Mode_Code[h] = mode
+
+    return (Electrolyzer_MW, PV_to_Elec_MW, Wind_to_Elec_MW, Hydro_to_Elec_MW, BESS_to_Elec_MW,
+            BESS_Charge_Before_Eff, BESS_Charge_After_Eff,
+            BESS_Discharge_Before_Eff, BESS_Discharge_After_Eff,
+            BESS_SOC_pct, BESS_Capacity_MWh, Curtailment_MW, Mode_Code)
+
+
+def _as_float_array(profile):
+    """Contiguous float32/float64 view of a profile; other dtypes go to float64."""
+    arr = np.ascontiguousarray(profile)
+    if arr.dtype != np.float32 and arr.dtype != np.float64:
+        arr = arr.astype(np.float64)
+    return arr
+
+
+def run_dispatch(pv_profile, wind_profile, bess_size_mwh, config, pv_scale=1.0):
+    """
+    Run single BESS scenario - exact VBA translation (JIT kernel + vectorized totals).
+    pv_profile is multiplied by pv_scale inside the kernel.
+    Returns: (hourly_df, summary_dict)
+    """
+    n_hours = len(pv_profile)
+    assert len(wind_profile) == n_hours
+
+    pv = _as_float_array(pv_profile)
+    wind = _as_float_array(wind_profile)
+    pv_scale = float(pv_scale)
+    elec_cap = float(config.electrolyzer_capacity_mw)
+    hydro_mw = float(config.hydro_power_mw)
+
+    (Electrolyzer_MW, PV_to_Elec_MW, Wind_to_Elec_MW, Hydro_to_Elec_MW, BESS_to_Elec_MW,
+     BESS_Charge_Before_Eff, BESS_Charge_After_Eff,
+     BESS_Discharge_Before_Eff, BESS_Discharge_After_Eff,
+     BESS_SOC_pct, BESS_Capacity_MWh, Curtailment_MW, Mode_Code) = _dispatch_kernel(
+        pv, wind, pv_scale, elec_cap, hydro_mw,
+        float(config.bess_max_power_mw), float(config.bess_charge_eff),
+        float(config.bess_discharge_eff), float(bess_size_mwh),
+    )
+
+    # Upcast before scaling: on NumPy 1.x value-based casting kept float32 * np.float64 scalar in float32
+    PV_MW = pv.astype(np.float64) * pv_scale
+    Wind_MW = wind.astype(np.float64)
+    Renewable_MW = np.maximum(0.0, PV_MW) + Wind_MW
+    BESS_Charge_Loss = BESS_Charge_Before_Eff - BESS_Charge_After_Eff
+    BESS_Discharge_Loss = BESS_Discharge_Before_Eff - BESS_Discharge_After_Eff
+    H2_Production_kg = Electrolyzer_MW * 1000.0 / config.h2_conversion_factor
+    Capacity_Factor_pct = (Electrolyzer_MW / elec_cap) * 100.0 if elec_cap > 0 else np.zeros(n_hours)
+
+    mode_counts = np.bincount(Mode_Code, minlength=3)
+    hours_full = int(mode_counts[MODE_FIRM])
+    hours_partial = int(mode_counts[MODE_SUPPLEMENTAL])
+    hours_shutdown = int(mode_counts[MODE_SHUTDOWN])
+    h2_by_mode = np.bincount(Mode_Code, weights=H2_Production_kg, minlength=3)
+    h2_from_full = float(h2_by_mode[MODE_FIRM])
+    h2_from_partial = float(h2_by_mode[MODE_SUPPLEMENTAL])
+
+    total_energy_mwh = float(Electrolyzer_MW.sum())
+    total_charge_loss = float(BESS_Charge_Loss.sum())
+    total_discharge_loss = float(BESS_Discharge_Loss.sum())
+    total_curtailment = float(Curtailment_MW.sum())
+    total_renewable_generated = float(Renewable_MW.sum())
 
     overall_cf = (total_energy_mwh / (elec_cap * n_hours)) * 100.0
     firm_cf = (hours_full / n_hours) * 100.0
@@ -198,13 +224,16 @@ def run_dispatch(pv_profile, wind_profile, bess_size_mwh, config):
     curtail_pct = (total_curtailment / total_renewable_generated * 100.0) if total_renewable_generated > 0 else 0.0
     operating_hours_firm = hours_full
 
+    # Every column is a freshly built array, so the frame adopts them as-is:
+    # one contiguous block per column (struct-of-arrays), no consolidation copy
+    hour = np.arange(n_hours, dtype=np.int16)
     hourly_df = pd.DataFrame({
-        'Hour': Hour,
+        'Hour': hour,
         'PV_MW': PV_MW,
         'Wind_MW': Wind_MW,
         'Renewable_MW': Renewable_MW,
-        'Hydro_MW': Hydro_MW,
-        'Net_Available_MW': Net_Available_MW,
+        'Hydro_MW': np.full(n_hours, hydro_mw),
+        'Net_Available_MW': Electrolyzer_MW,
         'Electrolyzer_MW': Electrolyzer_MW,
         'PV_to_Elec_MW': PV_to_Elec_MW,
         'Wind_to_Elec_MW': Wind_to_Elec_MW,
@@ -221,11 +250,13 @@ def run_dispatch(pv_profile, wind_profile, bess_size_mwh, config):
         'Curtailment_MW': Curtailment_MW,
         'H2_Production_kg/h': H2_Production_kg,
         'Capacity_Factor_%': Capacity_Factor_pct,
-        'Operation_Mode': Operation_Mode,
-    })
+        'Operation_Mode': pd.Categorical.from_codes(Mode_Code, categories=MODE_LABELS),
+        'Day': hour // 24,
+        'Hour_of_Day': (hour % 24).astype(np.int8),
+    }, copy=False)
 
-    hourly_df['Day'] = hourly_df['Hour'] // 24
-    days_24h = int(hourly_df.groupby('Day')['Operation_Mode'].apply(lambda x: (x == 'FIRM').all()).sum())
+    is_firm = Mode_Code == MODE_FIRM
+    days_24h = int(np.logical_and.reduceat(is_firm, np.arange(0, n_hours, 24)).sum())
 
     summary = {
         'bess_size_mwh': bess_size_mwh,
@@ -252,15 +283,17 @@ def run_dispatch(pv_profile, wind_profile, bess_size_mwh, config):
     return hourly_df, summary
 
 
-def run_bess_sensitivity(pv_profile, wind_profile, bess_sizes, config, progress_callback=None):
+def run_bess_sensitivity(pv_profile, wind_profile, bess_sizes, config, progress_callback=None, pv_scale=1.0):
+    pv_profile = _as_float_array(pv_profile)
+    wind_profile = _as_float_array(wind_profile)
     results = []
     hourly_data = {}
     for idx, bess_size in enumerate(bess_sizes):
         if progress_callback:
             progress_callback(idx, len(bess_sizes), bess_size)
-        hourly_df, summary = run_dispatch(pv_profile, wind_profile, bess_size, config)
+        hourly_df, summary = run_dispatch(pv_profile, wind_profile, bess_size, config, pv_scale)
         results.append(summary)
-        hourly_data[bess_size] = hourly_df
+        hourly_data[float(bess_size)] = hourly_df
     return pd.DataFrame(results), hourly_data
 
 
@@ -268,43 +301,87 @@ def run_pv_sensitivity(pv_profile_ref, wind_profile, bess_sizes, config,
                        pv_cases=None, pv_reference_mw=1000.0, progress_callback=None):
     """
     FIXED: Added pv_reference_mw parameter.
+    All PV x BESS scenarios run on a thread pool (the JIT kernel releases the GIL);
+    progress_callback fires on the calling thread as each scenario completes.
     """
     if pv_cases is None:
         pv_cases = {"1000 MW PV": 1000.0, "500 MW PV": 500.0}
 
-    pv_results = {}
+    # Profiles are converted once and shared; each case only carries its scale factor
+    pv_profile_ref = _as_float_array(pv_profile_ref)
+    wind_profile = _as_float_array(wind_profile)
+
+    jobs = []
     for label, pv_mw in pv_cases.items():
         scale = pv_mw / pv_reference_mw
-        scaled_pv = pv_profile_ref * scale
-
-        cfg = SystemConfig(
-            electrolyzer_capacity_mw=config.electrolyzer_capacity_mw,
-            hydro_power_mw=config.hydro_power_mw,
-            bess_max_power_mw=config.bess_max_power_mw,
-            bess_charge_eff=config.bess_charge_eff,
-            bess_discharge_eff=config.bess_discharge_eff,
-            pv_capacity_mw=pv_mw,
-            wind_capacity_mw=config.wind_capacity_mw,
-            h2_conversion_factor=config.h2_conversion_factor,
-        )
-
-        summary_df, hourly_data = run_bess_sensitivity(scaled_pv, wind_profile, bess_sizes, cfg, progress_callback)
-        pv_results[label] = {'summary': summary_df, 'hourly': hourly_data}
+
+        cfg = replace(config, pv_capacity_mw=pv_mw)
+        for idx, bess_size in enumerate(bess_sizes):
+            jobs.append((label, idx, bess_size, cfg, scale))
+
+    outputs = {}
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+        futures = {
+            pool.submit(run_dispatch, pv_profile_ref, wind_profile, bess_size, cfg, scale): (label, idx, bess_size)
+            for label, idx, bess_size, cfg, scale in jobs
+        }
+        for future in as_completed(futures):
+            label, idx, bess_size = futures[future]
+            if progress_callback:
+                progress_callback(idx, len(bess_sizes), bess_size)
+            outputs[(label, idx)] = future.result()
+
+    # Per-scenario view stats (mode counts, mean CF, representative days) are
+    # computed while each hourly frame is still hot, so UIs can look them up
+    pv_results = {}
+    for label in pv_cases:
+        data = {'hourly': {}, 'mode_counts': {}, 'cf_mean': {}, 'rep_days': {}}
+        results = []
+        # Renewable supply doesn't depend on the battery: one pick per PV case
+        rep_days = get_representative_days(outputs[(label, 0)][0]) if bess_sizes else None
+        for idx, bess_size in enumerate(bess_sizes):
+            hourly_df, summary = outputs[(label, idx)]
+            key = float(bess_size)
+            results.append(summary)
+            data['hourly'][key] = hourly_df
+            data['mode_counts'][key] = np.bincount(hourly_df['Operation_Mode'].cat.codes.to_numpy(), minlength=3)
+            data['cf_mean'][key] = float(hourly_df['Capacity_Factor_%'].to_numpy().mean())
+            data['rep_days'][key] = rep_days
+        pv_results[label] = {'summary': pd.DataFrame(results), **data}
 
     return pv_results
 
 
 def get_representative_days(hourly_df):
-    df = hourly_df.copy()
-    df['Day'] = df['Hour'] // 24
-    df['Hour_of_Day'] = df['Hour'] % 24
+    """
+    Start hours of the median and ~P10 renewable days.
+    Days with equal totals resolve to the earliest one. Totals are plain reduceat float
+    sums, not pandas' compensated groupby sum, so days within rounding of each other
+    may rank differently than the original groupby/sort_values version did.
+    Callers slice hourly_df.iloc[start:start + 24] for the 24-row view.
+    """
+    renewable = hourly_df['Renewable_MW'].to_numpy()
+    daily_renewable = np.add.reduceat(renewable, np.arange(0, len(renewable), 24))
+
+    # argpartition's pick among tied totals is arbitrary; take the first day holding the median value
+    mid = len(daily_renewable) // 2
+    median_value = np.partition(daily_renewable, mid)[mid]
+    median_day = np.flatnonzero(daily_renewable == median_value)[0]
+
+    p10_value = np.quantile(daily_renewable, 0.10)
+    low_day = np.abs(daily_renewable - p10_value).argmin()
+
+    return int(median_day) * 24, int(low_day) * 24
+
 
-    daily_renewable = df.groupby('Day')['Renewable_MW'].sum()
-    median_day = daily_renewable.sort_values().index[len(daily_renewable) // 2]
-    typical_day = df[df['Day'] == median_day].copy()
+def warm_up():
+    """Compile (or load from .numba_cache) the kernel for float32 and float64 profiles."""
+    for dtype in (np.float32, np.float64):
+        profile = np.zeros(24, dtype=dtype)
+        _dispatch_kernel(profile, profile, 1.0, 500.0, 250.0, 500.0, 0.9, 0.9, 500.0)
 
-    p10_value = daily_renewable.quantile(0.10)
-    low_day = (daily_renewable - p10_value).abs().idxmin()
-    low_renewable_day = df[df['Day'] == low_day].copy()
 
-    return typical_day, low_renewable_day
+if __name__ == '__main__':
+    # Warm the on-disk JIT cache, e.g. at container build
+    warm_up()
+    print(f"Numba cache warmed in {os.environ['NUMBA_CACHE_DIR']}")
@@ -0,0 +1,72 @@
+"""
+PV case text-area parser (app._parse_pv_cases)
+app.py is a Streamlit script, so the parser and its regexes are lifted out of it
+without running the page; the st.cache_data decorator is dropped.
+"""
+
+import ast
+import pathlib
+import re
+import unittest
+
+APP = pathlib.Path(__file__).resolve().parent.parent / 'app.py'
+_NAMES = {'_NUMBER', '_PV_CASE', '_parse_pv_cases'}
+
+
+def _load_parser():
+    tree = ast.parse(APP.read_text(encoding='utf-8'))
+    nodes = []
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and {getattr(t, 'id', None) for t in node.targets} & _NAMES:
+            nodes.append(node)
+        elif isinstance(node, ast.FunctionDef) and node.name in _NAMES:
+            node.decorator_list = []
+            nodes.append(node)
+    ns = {'re': re}
+    exec(compile(ast.Module(body=nodes, type_ignores=[]), str(APP), 'exec'), ns)
+    return ns['_parse_pv_cases']
+
+
+def _baseline(text):
+    """Original splitlines()/split(':')/strip() loop."""
+    pv_cases = {}
+    for line in text.strip().splitlines():
+        if ':' in line:
+            label, mw = line.split(':', 1)
+            try:
+                pv_cases[label.strip()] = float(mw.strip())
+            except ValueError:
+                pass
+    return tuple(pv_cases.items())
+
+
+class ParsePvCasesTest(unittest.TestCase):
+    parse = staticmethod(_load_parser())
+
+    def test_default_input(self):
+        self.assertEqual(self.parse("1000 MW PV: 1000\n500 MW PV: 500"),
+                         (('1000 MW PV', 1000.0), ('500 MW PV', 500.0)))
+
+    def test_crlf_lines(self):
+        self.assertEqual(self.parse("1000 MW PV: 1000\r\n500 MW PV: 500\r\n"),
+                         (('1000 MW PV', 1000.0), ('500 MW PV', 500.0)))
+
+    def test_blank_and_whitespace_lines(self):
+        text = "\r\n  \r\n1000 MW PV : 1000 \r\n\r\n\t\n 500 MW PV:500\t\n\n"
+        self.assertEqual(self.parse(text), (('1000 MW PV', 1000.0), ('500 MW PV', 500.0)))
+
+    def test_matches_baseline_loop(self):
+        for text in [
+            "A: 1\rB: 2",
+            "A: 1\r\nno colon here\r\nB: x\r\nC: 3e2\r\n",
+            "A: 1\nA: 2",
+            "A: 1: 2\n: 5\nB:-.5",
+            "",
+            "\r\n\r\n",
+        ]:
+            with self.subTest(text=text):
+                self.assertEqual(self.parse(text), _baseline(text))
+
+
+if __name__ == '__main__':
+    unittest.main()